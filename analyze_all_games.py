@@ -2,23 +2,60 @@
 """
 Analyze All Chess Games Script
 
-Iterates through all games in lichess_games.json and analyzes them using Ollama
-with streaming output to show the analysis progress in real-time.
+Iterates through all games in lichess_games.ndjson and analyzes them using Ollama
+with streaming output, running a small pool of games concurrently and printing
+each game's stream as it completes.
 """
 
+import io
 import json
 import requests
 import os
 import sys
+import threading
 import time
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, TextIO, Tuple
 from datetime import datetime
-from game_analyzer import analyze_games_from_file, GameInfo, OllamaAnalyzer
+from game_analyzer import analyze_games_from_file, iter_stream_frames, parse_stream_frame, GameInfo, OllamaAnalyzer, OLLAMA_POOL_SIZE
+
+class AdaptiveBackoff:
+    """Delay before live Ollama requests that grows when requests fail and decays as they succeed."""
+    
+    def __init__(self, min_delay: float = 1.0, max_delay: float = 30.0):
+        self.delay = 0.0
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+    
+    def wait(self, out: Optional[TextIO] = None) -> None:
+        """Sleep for the current back-off delay, if any."""
+        with self._lock:
+            delay = self.delay
+        if delay > 0:
+            print(f"⏸️  Backing off {delay:.1f}s before next request...", file=out)
+            time.sleep(delay)
+    
+    def record_success(self) -> None:
+        """Halve the delay, dropping to zero once it is below the minimum."""
+        with self._lock:
+            self.delay = self.delay / 2 if self.delay / 2 >= self.min_delay else 0.0
+    
+    def record_failure(self) -> None:
+        """Double the delay, starting from the minimum and capped at the maximum."""
+        with self._lock:
+            self.delay = min(self.max_delay, max(self.min_delay, self.delay * 2))
 
 class StreamingOllamaAnalyzer(OllamaAnalyzer):
     """Extended OllamaAnalyzer with streaming support and debug logs."""
     
-    def analyze_game_streaming(self, game: GameInfo, username: str, model: str = "llama3.2:1b") -> Optional[str]:
+    def __init__(self, ollama_url: str = "http://127.0.0.1:11434", cache_dir: str = "analysis_cache"):
+        super().__init__(ollama_url, cache_dir)
+        
+        # Throttles live generations only while Ollama is failing; cache hits never wait
+        self.backoff = AdaptiveBackoff()
+    
+    def analyze_game_streaming(self, game: GameInfo, username: str, model: str = "llama3.2:1b", out: Optional[TextIO] = None, quiet: bool = False) -> Optional[str]:
         """
         Analyze game with streaming output and debug logs.
         
@@ -26,6 +63,8 @@ class StreamingOllamaAnalyzer(OllamaAnalyzer):
             game: GameInfo object containing game data
             username: Username of the player to analyze
             model: Ollama model to use for analysis
+            out: Stream for progress output (defaults to stdout)
+            quiet: If True, don't echo streamed tokens
         
         Returns:
             Complete analysis text from the LLM or None if failed
@@ -33,6 +72,9 @@ class StreamingOllamaAnalyzer(OllamaAnalyzer):
         if not self.test_connection():
             return None
         
+        if out is None:
+            out = sys.stdout
+        
         prompt = self.format_game_for_analysis(game, username)
         
         payload = {
@@ -41,61 +83,74 @@ class StreamingOllamaAnalyzer(OllamaAnalyzer):
             "stream": True  # Enable streaming
         }
         
-        print(f"\n🔍 Starting analysis for game {game.game_id}")
-        print(f"📡 Model: {model}")
-        print(f"🎯 Player: {username} vs {game.black_player if game.white_player.lower() == username.lower() else game.white_player}")
-        print(f"♟️  Opening: {game.opening_name}")
-        print(f"⏱️  Time Control: {game.time_control}")
-        print(f"📊 Total Moves: {game.total_moves}")
-        print("=" * 80)
-        print("🤖 Ollama Response Stream:")
-        print("-" * 40)
+        print(f"\n🔍 Starting analysis for game {game.game_id}", file=out)
+        print(f"📡 Model: {model}", file=out)
+        print(f"🎯 Player: {username} vs {game.black_player if game.white_player_lc == username.lower() else game.white_player}", file=out)
+        print(f"♟️  Opening: {game.opening_name}", file=out)
+        print(f"⏱️  Time Control: {game.time_control}", file=out)
+        print(f"📊 Total Moves: {game.total_moves}", file=out)
+        print("=" * 80, file=out)
+        print("🤖 Ollama Response Stream:", file=out)
+        print("-" * 40, file=out)
         
         try:
-            response = requests.post(
+            self.backoff.wait(out)
+            with self.session.post(
                 self.api_url,
                 json=payload,
                 timeout=300,  # Longer timeout for streaming
                 stream=True
-            )
-            response.raise_for_status()
-            
-            full_analysis = ""
-            
-            # Process streaming response
-            for line in response.iter_lines(decode_unicode=True):
-                if line.strip():
+            ) as response:
+                response.raise_for_status()
+                
+                parts: List[str] = []
+                last_flush = time.monotonic()
+                
+                # Process streaming response. Frames are read to the end of the
+                # body, even past the final one, so the connection is returned to
+                # the pool for the next game instead of being closed
+                for line in iter_stream_frames(response):
                     try:
-                        chunk_data = json.loads(line)
-                        if 'response' in chunk_data:
-                            chunk_text = chunk_data['response']
-                            # Print chunk in real-time with streaming effect
-                            print(chunk_text, end='', flush=True)
-                            full_analysis += chunk_text
+                        chunk_text, done = parse_stream_frame(line)
+                        if chunk_text is not None:
+                            parts.append(chunk_text)
+                            
+                            # Echo tokens as they arrive, flushing at most every 50ms
+                            if not quiet:
+                                out.write(chunk_text)
+                                now = time.monotonic()
+                                if now - last_flush > 0.05:
+                                    out.flush()
+                                    last_flush = now
                         
                         # Check if this is the final chunk
-                        if chunk_data.get('done', False):
-                            print()  # New line after streaming completes
-                            break
+                        if done:
+                            print(file=out)  # New line after streaming completes
                             
                     except json.JSONDecodeError as e:
-                        print(f"\n⚠️  JSON decode error: {e}")
+                        print(f"\n⚠️  JSON decode error: {e}", file=out)
                         continue
             
-            print("\n" + "=" * 80)
-            print(f"✅ Analysis completed for game {game.game_id}")
-            print(f"📄 Analysis length: {len(full_analysis)} characters")
+            out.flush()
+            
+            full_analysis = ''.join(parts)
+            self.backoff.record_success()
+            
+            print("\n" + "=" * 80, file=out)
+            print(f"✅ Analysis completed for game {game.game_id}", file=out)
+            print(f"📄 Analysis length: {len(full_analysis)} characters", file=out)
             
             return full_analysis if full_analysis.strip() else None
             
         except requests.exceptions.RequestException as e:
-            print(f"\n❌ Failed to analyze game: {e}")
+            self.backoff.record_failure()
+            print(f"\n❌ Failed to analyze game: {e}", file=out)
             return None
         except Exception as e:
-            print(f"\n❌ Unexpected error during analysis: {e}")
+            print(f"\n❌ Unexpected error during analysis: {e}", file=out)
             return None
     
-    def analyze_game_with_streaming_cache(self, game: GameInfo, username: str, model: str = "llama3.2:1b", force_refresh: bool = False) -> Optional[str]:
+    def analyze_game_with_streaming_cache(self, game: GameInfo, username: str, model: str = "llama3.2:1b", force_refresh: bool = False, out: Optional[TextIO] = None, quiet: bool = False) -> Tuple[Optional[str], bool]:
         """
         Analyze game with streaming support and caching.
         
@@ -104,25 +159,33 @@ class StreamingOllamaAnalyzer(OllamaAnalyzer):
             username: Username of the player to analyze
             model: Ollama model to use for analysis
             force_refresh: If True, bypass cache and generate new analysis
+            out: Stream for progress output (defaults to stdout)
+            quiet: If True, don't echo streamed tokens
         
         Returns:
-            Analysis text from the LLM or cached result
+            Tuple of (analysis text or None if failed, whether it came from the cache)
         """
         # Try to load from cache first (unless force refresh)
         if not force_refresh:
             cached_analysis = self.load_analysis_from_cache(game.game_id, model, username)
             if cached_analysis:
-                print(f"💾 Using cached analysis for game {game.game_id}")
-                return cached_analysis['analysis']
+                print(f"💾 Using cached analysis for game {game.game_id}", file=out)
+                return cached_analysis['analysis'], True
         
         # Generate new analysis with streaming
-        analysis = self.analyze_game_streaming(game, username, model)
+        analysis = self.analyze_game_streaming(game, username, model, out, quiet)
         
         # Cache the result if successful
         if analysis:
             self.save_analysis_to_cache(game.game_id, model, username, analysis, game)
         
-        return analysis
+        return analysis, False
+
+def _analyze_game_buffered(analyzer: StreamingOllamaAnalyzer, game: GameInfo, username: str, model: str, force_refresh: bool, quiet: bool) -> tuple:
+    """Run one analysis in a worker thread, capturing its output so games don't interleave."""
+    log = io.StringIO()
+    analysis, was_cached = analyzer.analyze_game_with_streaming_cache(game, username, model, force_refresh, out=log, quiet=quiet)
+    return analysis, was_cached, log.getvalue()
 
 def analyze_all_games(
     username: str = "lza808",
@@ -130,7 +193,8 @@ def analyze_all_games(
     max_games: Optional[int] = None,
     force_refresh: bool = False,
     start_from: Optional[str] = None,
-    delay_between_games: float = 2.0
+    max_workers: int = 3,
+    quiet: bool = False
 ) -> Dict[str, any]:
     """
     Analyze all games with streaming output and progress tracking.
@@ -141,7 +205,8 @@ def analyze_all_games(
         max_games: Maximum number of games to analyze (None for all)
         force_refresh: If True, bypass cache for all games
         start_from: Game ID to start from (useful for resuming)
-        delay_between_games: Seconds to wait between game analyses
+        max_workers: Number of games analyzed concurrently (capped at OLLAMA_POOL_SIZE)
+        quiet: If True, don't echo streamed tokens (analyses are still cached)
     
     Returns:
         Dictionary with analysis results and statistics
@@ -152,7 +217,7 @@ def analyze_all_games(
     # Load all games
     games = analyze_games_from_file()
     if not games:
-        print("❌ No games found. Make sure lichess_games.json exists.")
+        print("❌ No games found. Make sure lichess_games.ndjson exists.")
         return {"error": "No games found"}
     
     print(f"📚 Loaded {len(games)} games total")
@@ -178,8 +243,13 @@ def analyze_all_games(
         return {"error": "Ollama connection failed"}
     
     print("✅ Connected to Ollama successfully")
+    
+    # More workers than pooled connections would have urllib3 discard the extras
+    if max_workers > OLLAMA_POOL_SIZE:
+        print(f"⚠️  Limiting workers to {OLLAMA_POOL_SIZE} (Ollama connection pool size)")
+        max_workers = OLLAMA_POOL_SIZE
     print(f"🤖 Using model: {model}")
-    print(f"⏱️  Delay between games: {delay_between_games}s")
+    print(f"🧵 Concurrent workers: {max_workers}")
     
     # Analysis statistics
     stats = {
@@ -194,54 +264,57 @@ def analyze_all_games(
     print(f"\n🚀 Beginning analysis of {len(games)} games...")
     print("=" * 80)
     
-    for i, game in enumerate(games, 1):
-        print(f"\n📋 GAME {i}/{len(games)}")
-        print(f"🆔 Game ID: {game.game_id}")
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {}
+        for i, game in enumerate(games, 1):
+            future = executor.submit(_analyze_game_buffered, analyzer, game, username, model, force_refresh, quiet)
+            futures[future] = (i, game)
         
-        # Check if already cached (unless force refresh)
-        is_cached = False
-        if not force_refresh:
-            cached = analyzer.load_analysis_from_cache(game.game_id, model, username)
-            is_cached = cached is not None
-        
-        try:
-            analysis = analyzer.analyze_game_with_streaming_cache(
-                game, username, model, force_refresh
-            )
+        for completed, future in enumerate(as_completed(futures), 1):
+            i, game = futures[future]
+            print(f"\n📋 GAME {i}/{len(games)}")
+            print(f"🆔 Game ID: {game.game_id}")
             
-            if analysis:
-                stats["successful_analyses"] += 1
-                if is_cached:
-                    stats["cached_analyses"] += 1
+            try:
+                analysis, is_cached, log = future.result()
+                print(log, end='')
                 
-                # Store game info for final report
-                stats["analyzed_games"].append({
-                    "game_id": game.game_id,
-                    "opening": game.opening_name,
-                    "result": game.winner or "draw",
-                    "total_moves": game.total_moves,
-                    "analysis_length": len(analysis),
-                    "was_cached": is_cached
-                })
-                
-                print(f"✅ Successfully analyzed game {i}/{len(games)}")
-            else:
+                if analysis:
+                    stats["successful_analyses"] += 1
+                    if is_cached:
+                        stats["cached_analyses"] += 1
+                    
+                    # Store game info for final report
+                    stats["analyzed_games"].append({
+                        "game_id": game.game_id,
+                        "opening": game.opening_name,
+                        "result": game.winner or "draw",
+                        "total_moves": game.total_moves,
+                        "analysis_length": len(analysis),
+                        "was_cached": is_cached
+                    })
+                    
+                    print(f"✅ Successfully analyzed game {i}/{len(games)}")
+                else:
+                    stats["failed_analyses"] += 1
+                    print(f"❌ Failed to analyze game {i}/{len(games)}")
+            
+            except Exception as e:
                 stats["failed_analyses"] += 1
-                print(f"❌ Failed to analyze game {i}/{len(games)}")
-        
-        except Exception as e:
-            stats["failed_analyses"] += 1
-            print(f"❌ Error analyzing game {game.game_id}: {e}")
-        
-        # Progress update
-        remaining = len(games) - i
-        if remaining > 0:
-            print(f"📊 Progress: {i}/{len(games)} ({i/len(games)*100:.1f}%) | {remaining} games remaining")
+                print(f"❌ Error analyzing game {game.game_id}: {e}")
             
-            # Delay before next game (except for last game)
-            if delay_between_games > 0:
-                print(f"⏸️  Waiting {delay_between_games}s before next game...")
-                time.sleep(delay_between_games)
+            # Progress update
+            remaining = len(games) - completed
+            if remaining > 0:
+                print(f"📊 Progress: {completed}/{len(games)} ({completed/len(games)*100:.1f}%) | {remaining} games remaining")
+    except BaseException:
+        # On Ctrl-C, drop the queued games instead of letting the workers drain
+        # them; only generations already in flight run to completion
+        print("\n🛑 Stopping, cancelling remaining games...")
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
     
     # Final statistics
     stats["end_time"] = datetime.now()
@@ -273,10 +346,15 @@ def main():
     parser.add_argument("--max-games", type=int, help="Maximum number of games to analyze")
     parser.add_argument("--force-refresh", action="store_true", help="Force refresh all analyses (bypass cache)")
     parser.add_argument("--start-from", help="Game ID to start analysis from")
-    parser.add_argument("--delay", type=float, default=2.0, help="Delay between games in seconds")
+    parser.add_argument("--workers", type=int, default=3, help=f"Number of games to analyze concurrently (at most {OLLAMA_POOL_SIZE})")
+    parser.add_argument("--quiet", action="store_true", help="Don't echo analysis tokens as they stream")
+    parser.add_argument("--delay", type=float, help="Deprecated and ignored; requests now back off only when Ollama fails")
     
     args = parser.parse_args()
     
+    if args.delay is not None:
+        print("⚠️  --delay is deprecated and has no effect")
+    
     # Run the analysis
     stats = analyze_all_games(
         username=args.username,
@@ -284,7 +362,8 @@ def main():
         max_games=args.max_games,
         force_refresh=args.force_refresh,
         start_from=args.start_from,
-        delay_between_games=args.delay
+        max_workers=args.workers,
+        quiet=args.quiet
     )
     
     if "error" in stats:
@@ -5,35 +5,135 @@ Chess Games Flask Web App
 A simple Flask web application to display and analyze chess games from Lichess.
 """
 
-from flask import Flask, render_template, request
-from game_analyzer import analyze_games_from_file, list_cached_analyses
+from flask import Flask, make_response, render_template, request, stream_template
+from game_analyzer import analyze_games_from_file, find_games_file, list_cached_analyses, summarize_games
 from datetime import datetime
+from functools import lru_cache
+import hashlib
 import markdown
+import os
+import threading
+
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
 
 app = Flask(__name__)
 
+# gzip responses when flask-compress is installed
+if Compress is not None:
+    Compress(app)
+
+USERNAME = "lza808"
+
+# Parsed games and derived stats, reloaded only when the games file changes on disk.
+# Each load is a new snapshot dict, swapped in whole so a request never mixes two loads
+_NO_GAMES = {"games": [], "by_id": {}, "stats": None, "etag": None}
+_GAMES_CACHE = {"mtime": None, "snapshot": _NO_GAMES}
+_GAMES_LOCK = threading.Lock()
+
+def _get_games():
+    """
+    Return the current games snapshot, re-reading the games file only if it changed.
+    
+    The snapshot holds the parsed games list, an index by game ID, the stats
+    and the ETag, all from the same load of the file.
+    """
+    games_file = find_games_file()
+    try:
+        mtime = os.stat(games_file).st_mtime
+    except OSError:
+        # Drop the last load so game and stats lookups don't serve stale data
+        with _GAMES_LOCK:
+            _GAMES_CACHE.update(mtime=None, snapshot=_NO_GAMES)
+        return _NO_GAMES
+    
+    with _GAMES_LOCK:
+        if _GAMES_CACHE["mtime"] != mtime:
+            games = analyze_games_from_file(games_file)
+            _GAMES_CACHE["snapshot"] = {
+                "games": games,
+                # Built from the end so the first occurrence of a duplicated ID wins, as before
+                "by_id": {g.game_id: g for g in reversed(games)},
+                "stats": _compute_stats(games, USERNAME) if games else None,
+                "etag": hashlib.md5(f"{mtime}:{len(games)}".encode()).hexdigest()
+            }
+            _GAMES_CACHE["mtime"] = mtime
+        return _GAMES_CACHE["snapshot"]
+
+def _render_games_page(template, etag, stream=False, **context):
+    """
+    Render a page derived from the games file, answering 304 if the client's ETag is current.
+    
+    The ETag must come from the same games snapshot as the page's context.
+    With stream=True the template is sent to the client in chunks as it renders.
+    """
+    # Weak ETags are left as-is by flask-compress, which would otherwise add
+    # an encoding suffix to a strong ETag so it never matches here
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+    else:
+        render = stream_template if stream else render_template
+        response = make_response(render(template, **context))
+    response.set_etag(etag, weak=True)
+    return response
+
+# Markdown instances aren't thread-safe, so the shared converter is used under a lock
+_MARKDOWN = markdown.Markdown(extensions=['extra', 'codehilite'])
+_MARKDOWN_LOCK = threading.Lock()
+
+@lru_cache(maxsize=512)
+def _render_markdown(text):
+    """Convert analysis markdown to HTML, memoized on the analysis text."""
+    with _MARKDOWN_LOCK:
+        html = _MARKDOWN.convert(text)
+        _MARKDOWN.reset()
+    return html
+
+def _get_game(game_id):
+    """Look up a single game by ID, or None if it isn't in the games file."""
+    return _get_games()["by_id"].get(game_id)
+
+def _compute_stats(games, username):
+    """Aggregate win/loss/draw counts and top openings for a player."""
+    summary = summarize_games(games, username, top_openings=10)
+    wins = summary['wins']
+    
+    return {
+        'total_games': len(games),
+        'wins': wins,
+        'losses': summary['losses'],
+        'draws': summary['draws'],
+        'win_rate': round((wins / len(games)) * 100, 1) if games else 0,
+        'top_openings': summary['top_openings'],
+        'latest_game': games[0] if games else None,
+        'oldest_game': games[-1] if games else None
+    }
+
 @app.route('/')
 def index():
     """Main route showing all available games."""
-    games = analyze_games_from_file()
+    snapshot = _get_games()
+    games = snapshot["games"]
     
     if not games:
         return render_template('error.html', 
-                             error_message="No games found. Make sure lichess_games.json exists.")
+                             error_message="No games found. Make sure lichess_games.ndjson exists.")
     
-    return render_template('games_list.html', games=games)
+    return _render_games_page('games_list.html', snapshot["etag"], stream=True, games=games)
 
 @app.route('/game/<game_id>')
 def game_detail(game_id):
     """Show detailed view of a specific game."""
-    games = analyze_games_from_file()
-    game = next((g for g in games if g.game_id == game_id), None)
+    snapshot = _get_games()
+    game = snapshot["by_id"].get(game_id)
     
     if not game:
         return render_template('error.html', 
                              error_message=f"Game {game_id} not found.")
     
-    return render_template('game_detail.html', game=game)
+    return _render_games_page('game_detail.html', snapshot["etag"], game=game)
 
 @app.route('/analyze/<game_id>')
 def analyze_game(game_id):
@@ -41,8 +141,7 @@ def analyze_game(game_id):
     model = request.args.get('model', 'llama3.2:1b')
     force_refresh = request.args.get('force_refresh', 'false').lower() == 'true'
     
-    games = analyze_games_from_file()
-    game = next((g for g in games if g.game_id == game_id), None)
+    game = _get_game(game_id)
     
     if not game:
         return render_template('error.html', 
@@ -57,15 +156,14 @@ def analyze_game(game_id):
             return render_template('error.html', 
                                  error_message="Cannot connect to Ollama. Make sure it's running on http://127.0.0.1:11434")
         
-        analysis = analyzer.analyze_game_with_cache(game, "lza808", model, force_refresh)
+        analysis = analyzer.analyze_game_with_cache(game, USERNAME, model, force_refresh)
         
         if not analysis:
             return render_template('error.html', 
                                  error_message="Failed to generate analysis.")
         
         # Convert markdown to HTML
-        md = markdown.Markdown(extensions=['extra', 'codehilite'])
-        analysis_html = md.convert(analysis)
+        analysis_html = _render_markdown(analysis)
         
         return render_template('game_analysis.html', 
                              game=game, 
@@ -81,49 +179,19 @@ def analyze_game(game_id):
 def cached_analyses():
     """Show all cached analyses."""
     cached = list_cached_analyses()
-    return render_template('cached_analyses.html', cached=cached)
+    return stream_template('cached_analyses.html', cached=cached)
 
 @app.route('/stats')
 def stats():
     """Show game statistics."""
-    games = analyze_games_from_file()
+    snapshot = _get_games()
+    stats_data = snapshot["stats"]
     
-    if not games:
+    if not stats_data:
         return render_template('error.html', 
                              error_message="No games found.")
     
-    # Calculate stats
-    wins = losses = draws = 0
-    opening_counts = {}
-    
-    for game in games:
-        # Count results
-        if game.winner is None:
-            draws += 1
-        elif ((game.white_player.lower() == "lza808" and game.winner == "white") or
-              (game.black_player.lower() == "lza808" and game.winner == "black")):
-            wins += 1
-        else:
-            losses += 1
-        
-        # Count openings
-        opening_counts[game.opening_name] = opening_counts.get(game.opening_name, 0) + 1
-    
-    # Sort openings by frequency
-    top_openings = sorted(opening_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-    
-    stats_data = {
-        'total_games': len(games),
-        'wins': wins,
-        'losses': losses,
-        'draws': draws,
-        'win_rate': round((wins / len(games)) * 100, 1) if games else 0,
-        'top_openings': top_openings,
-        'latest_game': games[0] if games else None,
-        'oldest_game': games[-1] if games else None
-    }
-    
-    return render_template('stats.html', stats=stats_data)
+    return _render_games_page('stats.html', snapshot["etag"], stats=stats_data)
 
 @app.template_filter('format_datetime')
 def format_datetime(dt):
@@ -5,14 +5,44 @@ Chess Game Analyzer
 Functions to extract and analyze chess game data from Lichess API responses.
 """
 
+import atexit
 import json
 import requests
 import os
-from typing import List, Dict, Optional, Any
-from dataclasses import dataclass
+import re
+import sqlite3
+import threading
+import time
+from typing import Iterable, Iterator, List, Dict, Optional, Any, Tuple, Union
+from dataclasses import dataclass, field
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import chain, islice, zip_longest
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+from urllib3.util.retry import Retry
 
-@dataclass
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    """Decode JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """Encode JSON as compact UTF-8 bytes (or indented, if asked), using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None)
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+@dataclass(slots=True)
 class GameInfo:
     """Structured representation of a chess game."""
     game_id: str
@@ -21,13 +51,44 @@ class GameInfo:
     black_player: str
     white_rating: int
     black_rating: int
-    moves: List[str]  # List of moves in algebraic notation
+    moves_text: str  # Space-separated moves in algebraic notation, as sent by Lichess
     opening_name: str
     opening_eco: str  # ECO code (e.g., "B10")
     game_status: str  # 'mate', 'resign', 'draw', etc.
     time_control: str  # e.g., "10+5" for 10 minutes + 5 second increment
-    created_at: datetime
+    created_at_ms: int  # Creation time in milliseconds since the epoch, as sent by Lichess
     total_moves: int
+    # Lowercased player names, computed once for case-insensitive username matching
+    white_player_lc: str = field(init=False, repr=False, compare=False)
+    black_player_lc: str = field(init=False, repr=False, compare=False)
+    # Split moves, filled in on first access to `moves`
+    _moves: Optional[List[str]] = field(init=False, default=None, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.white_player_lc = self.white_player.lower()
+        self.black_player_lc = self.black_player.lower()
+    
+    @property
+    def moves(self) -> List[str]:
+        """List of moves in algebraic notation, split from moves_text on first access."""
+        if self._moves is None:
+            self._moves = self.moves_text.split()
+        return self._moves
+    
+    @property
+    def created_at(self) -> datetime:
+        """Creation time as a local datetime, converted on access."""
+        return datetime.fromtimestamp(self.created_at_ms / 1000)
+
+# Shared default for missing nested objects in extract_game_info; never mutated
+_EMPTY: Dict[str, Any] = {}
+
+# Canonical copies of the strings that repeat across an archive (player names,
+# openings, statuses, time controls), so every game shares one object per value
+_INTERNED: Dict[Optional[str], Optional[str]] = {}
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return _INTERNED.setdefault(value, value)
 
 def extract_game_info(game_data: Dict[str, Any]) -> GameInfo:
     """
@@ -40,34 +101,38 @@ def extract_game_info(game_data: Dict[str, Any]) -> GameInfo:
         GameInfo: Structured game information
     """
     # Extract winner
-    winner = game_data.get('winner')  # 'white', 'black', or None
+    winner = _intern(game_data.get('winner'))  # 'white', 'black', or None
     
     # Extract players
-    players = game_data.get('players', {})
-    white_player = players.get('white', {}).get('user', {}).get('name', 'Unknown')
-    black_player = players.get('black', {}).get('user', {}).get('name', 'Unknown')
-    white_rating = players.get('white', {}).get('rating', 0)
-    black_rating = players.get('black', {}).get('rating', 0)
+    players = game_data.get('players', _EMPTY)
+    white = players.get('white', _EMPTY)
+    black = players.get('black', _EMPTY)
+    white_player = _intern(white.get('user', _EMPTY).get('name', 'Unknown'))
+    black_player = _intern(black.get('user', _EMPTY).get('name', 'Unknown'))
+    white_rating = white.get('rating', 0)
+    black_rating = black.get('rating', 0)
     
     # Extract moves
-    moves_string = game_data.get('moves', '')
-    moves = moves_string.split() if moves_string else []
+    # Kept as the raw string; GameInfo.moves splits it only when the moves are needed.
+    # Lichess separates moves with single spaces, so counting them is enough here.
+    moves_text = game_data.get('moves', '')
+    total_moves = moves_text.count(' ') + 1 if moves_text else 0
     
     # Extract opening information
-    opening = game_data.get('opening', {})
-    opening_name = opening.get('name', 'Unknown Opening')
-    opening_eco = opening.get('eco', 'Unknown')
+    opening = game_data.get('opening', _EMPTY)
+    opening_name = _intern(opening.get('name', 'Unknown Opening'))
+    opening_eco = _intern(opening.get('eco', 'Unknown'))
     
     # Extract game metadata
     game_id = game_data.get('id', 'Unknown')
-    game_status = game_data.get('status', 'Unknown')
-    created_at = datetime.fromtimestamp(game_data.get('createdAt', 0) / 1000)
+    game_status = _intern(game_data.get('status', 'Unknown'))
+    created_at_ms = game_data.get('createdAt', 0)
     
     # Extract time control
-    clock = game_data.get('clock', {})
+    clock = game_data.get('clock', _EMPTY)
     initial_time = clock.get('initial', 0) // 60  # Convert seconds to minutes
     increment = clock.get('increment', 0)
-    time_control = f"{initial_time}+{increment}"
+    time_control = _intern(f"{initial_time}+{increment}")
     
     return GameInfo(
         game_id=game_id,
@@ -76,35 +141,69 @@ def extract_game_info(game_data: Dict[str, Any]) -> GameInfo:
         black_player=black_player,
         white_rating=white_rating,
         black_rating=black_rating,
-        moves=moves,
+        moves_text=moves_text,
         opening_name=opening_name,
         opening_eco=opening_eco,
         game_status=game_status,
         time_control=time_control,
-        created_at=created_at,
-        total_moves=len(moves)
+        created_at_ms=created_at_ms,
+        total_moves=total_moves
     )
 
-def analyze_games_from_file(filename: str = "lichess_games.json") -> List[GameInfo]:
+GAMES_FILE = "lichess_games.ndjson"
+LEGACY_GAMES_FILE = "lichess_games.json"
+
+def find_games_file() -> str:
+    """Return the games file to read, falling back to the old JSON array file if it's the only one present."""
+    if not os.path.exists(GAMES_FILE) and os.path.exists(LEGACY_GAMES_FILE):
+        return LEGACY_GAMES_FILE
+    return GAMES_FILE
+
+def iter_games_from_file(filename: Optional[str] = None) -> Iterator[GameInfo]:
     """
-    Load and analyze all games from a JSON file.
+    Lazily yield games from a games file, one at a time.
+    
+    NDJSON files (one Lichess game per line) are parsed line by line; files
+    holding a single JSON array, as older versions of the fetcher wrote, are
+    loaded whole.
     
     Args:
-        filename: Path to the JSON file containing game data
+        filename: Path to the games file (defaults to find_games_file())
+    
+    Yields:
+        GameInfo objects in file order
+    """
+    filename = filename or find_games_file()
+    with open(filename, 'rb') as f:
+        first_line = f.readline()
+        if first_line.lstrip().startswith(b'['):
+            games_data = json_loads(first_line + f.read())
+            for game in games_data:
+                yield extract_game_info(game)
+            return
+        
+        for line in chain((first_line,), f):
+            if line.strip():
+                yield extract_game_info(json_loads(line))
+
+def analyze_games_from_file(filename: Optional[str] = None) -> List[GameInfo]:
+    """
+    Load and analyze all games from a games file.
+    
+    Args:
+        filename: Path to the games file (defaults to find_games_file())
     
     Returns:
         List of GameInfo objects
     """
+    filename = filename or find_games_file()
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            games_data = json.load(f)
-        
-        return [extract_game_info(game) for game in games_data]
+        return list(iter_games_from_file(filename))
     
     except FileNotFoundError:
         print(f"Error: File {filename} not found")
         return []
-    except json.JSONDecodeError:
+    except ValueError:
         print(f"Error: Invalid JSON in {filename}")
         return []
     except Exception as e:
@@ -134,46 +233,334 @@ def get_win_loss_stats(games: List[GameInfo], username: str) -> Dict[str, int]:
     Returns:
         Dictionary with 'wins', 'losses', 'draws' counts
     """
-    wins = 0
-    losses = 0
-    draws = 0
+    username = username.lower()
+    total_games = wins = draws = 0
+    
+    for game in games:
+        total_games += 1
+        winner = game.winner
+        if winner is None:
+            draws += 1
+        elif (game.white_player_lc if winner == 'white' else game.black_player_lc) == username:
+            wins += 1
+    
+    # Every decided game the player didn't win counts as a loss
+    return {'wins': wins, 'losses': total_games - wins - draws, 'draws': draws}
+
+def summarize_games(games: Iterable[GameInfo], username: str, top_openings: int = 5) -> Dict[str, Any]:
+    """
+    Tally results and openings for a player in a single pass over the games.
+    
+    Args:
+        games: Any iterable of GameInfo objects (consumed once)
+        username: Username to calculate stats for
+        top_openings: Number of most common openings to return
+    
+    Returns:
+        Dictionary with 'total_games', 'wins', 'losses', 'draws' counts and
+        'top_openings' as a list of (opening_name, count) pairs
+    """
+    username = username.lower()
+    total_games = wins = losses = draws = 0
+    opening_counts = Counter()
     
     for game in games:
+        total_games += 1
         if game.winner is None:
             draws += 1
-        elif ((game.white_player.lower() == username.lower() and game.winner == 'white') or
-              (game.black_player.lower() == username.lower() and game.winner == 'black')):
+        elif (game.white_player_lc if game.winner == 'white' else game.black_player_lc) == username:
             wins += 1
         else:
             losses += 1
+        opening_counts[game.opening_name] += 1
+    
+    return {
+        'total_games': total_games,
+        'wins': wins,
+        'losses': losses,
+        'draws': draws,
+        'top_openings': opening_counts.most_common(top_openings)
+    }
+
+def summarize_games_from_file(username: str, filename: Optional[str] = None, top_openings: int = 5) -> Optional[Dict[str, Any]]:
+    """
+    Summarize a games file without materializing the full list of games.
+    
+    Args:
+        username: Username to calculate stats for
+        filename: Path to the games file (defaults to find_games_file())
+        top_openings: Number of most common openings to return
+    
+    Returns:
+        Summary dictionary as returned by summarize_games(), or None on error
+    """
+    filename = filename or find_games_file()
+    try:
+        return summarize_games(iter_games_from_file(filename), username, top_openings)
+    except FileNotFoundError:
+        print(f"Error: File {filename} not found")
+        return None
+    except ValueError:
+        print(f"Error: Invalid JSON in {filename}")
+        return None
+    except Exception as e:
+        print(f"Error analyzing games: {e}")
+        return None
+
+class CacheStore:
+    """
+    SQLite store of cached analyses, one row per (game_id, model, username).
+    
+    Saves are a single INSERT OR REPLACE and loads a primary-key lookup. Listing
+    columns (timestamp, opening) are stored alongside the analysis so listing the
+    cache is one SELECT that never touches the analysis text. The database runs in
+    WAL mode so the web app can read while the bulk analyzer writes.
+    """
+    
+    FILENAME = "cache.db"
+    
+    def __init__(self, cache_dir: str = "analysis_cache"):
+        self.cache_dir = cache_dir
+        self.path = os.path.join(cache_dir, self.FILENAME)
+        self._lock = threading.Lock()
+        
+        os.makedirs(cache_dir, exist_ok=True)
+        is_new = not os.path.exists(self.path)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS analyses ("
+                "game_id TEXT, model TEXT, username TEXT, ts REAL, timestamp TEXT, "
+                "opening_name TEXT, analysis TEXT, game_info BLOB, "
+                "PRIMARY KEY (game_id, model, username))"
+            )
+        if is_new:
+            self._migrate()
+    
+    @staticmethod
+    def _parse_timestamp(timestamp: Optional[str]) -> float:
+        # Parse the ISO timestamp once on write so listings sort and format on a plain float
+        try:
+            return datetime.fromisoformat(timestamp).timestamp() if timestamp else 0.0
+        except (TypeError, ValueError):
+            return 0.0
+    
+    def _row(self, entry: Dict) -> Tuple:
+        game_info = entry.get('game_info') or {}
+        return (
+            entry.get('game_id'),
+            entry.get('model'),
+            entry.get('username'),
+            self._parse_timestamp(entry.get('timestamp')),
+            entry.get('timestamp'),
+            game_info.get('opening_name', 'Unknown'),
+            entry.get('analysis'),
+            json_dumps(game_info),
+        )
+    
+    def _save_many(self, entries: Iterable[Dict]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._row(entry) for entry in entries)
+            )
+    
+    def load(self, game_id: str, model: str, username: str) -> Optional[Dict]:
+        """Return the cached entry for a key, or None if there isn't one."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT analysis, timestamp, game_info FROM analyses "
+                "WHERE game_id = ? AND model = ? AND username = ?",
+                (game_id, model, username)
+            ).fetchone()
+        if row is None:
+            return None
+        analysis, timestamp, game_info = row
+        return {
+            'game_id': game_id,
+            'model': model,
+            'username': username,
+            'analysis': analysis,
+            'timestamp': timestamp,
+            'game_info': json_loads(game_info)
+        }
+    
+    def save(self, entry: Dict) -> None:
+        """Insert an entry, replacing any earlier entry for the same key."""
+        self._save_many((entry,))
+    
+    def list_metadata(self) -> List[Dict]:
+        """Return listing metadata for every cached key, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT game_id, model, username, timestamp, ts, opening_name "
+                "FROM analyses ORDER BY ts DESC"
+            ).fetchall()
+        return [{
+            'game_id': game_id,
+            'model': model,
+            'username': username,
+            'timestamp': timestamp,
+            'mtime': ts,
+            'opening': opening_name
+        } for game_id, model, username, timestamp, ts, opening_name in rows]
+    
+    def _migrate(self) -> None:
+        """One-time import of the older one-file-per-analysis cache."""
+        for filename in sorted(os.listdir(self.cache_dir)):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.cache_dir, filename), 'rb') as f:
+                    self.save(json_loads(f.read()))
+            except Exception as e:
+                print(f"Warning: Could not migrate {filename}: {e}")
+
+# Stores are shared per directory so every analyzer reuses one connection
+_CACHE_STORES: Dict[str, CacheStore] = {}
+_CACHE_STORES_LOCK = threading.Lock()
+
+def get_cache_store(cache_dir: str = "analysis_cache") -> CacheStore:
+    """Return the shared CacheStore for a cache directory."""
+    key = os.path.abspath(cache_dir)
+    with _CACHE_STORES_LOCK:
+        if key not in _CACHE_STORES:
+            _CACHE_STORES[key] = CacheStore(cache_dir)
+        return _CACHE_STORES[key]
+
+def create_session(pool_size: int = 10, retries: Optional[Retry] = None) -> requests.Session:
+    """
+    Create a requests Session whose connections are pooled and reused across requests.
+    
+    Args:
+        pool_size: Number of connections kept open per host
+        retries: Retry policy for failed requests (no retries by default)
     
-    return {'wins': wins, 'losses': losses, 'draws': draws}
+    Returns:
+        Session with the pooled adapter mounted for http and https
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries or 0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# Most Ollama stream frames carry a plain "response" string with no escapes; match
+# those directly and leave anything unusual to the full JSON parser
+_RESPONSE_RE = re.compile(rb'"response":\s*"([^"\\]*)"')
+_DONE_RE = re.compile(rb'"done":\s*true')
+
+def parse_stream_frame(line: bytes) -> Tuple[Optional[str], bool]:
+    """Extract (response text, done flag) from one Ollama stream frame."""
+    match = _RESPONSE_RE.search(line)
+    if match is not None:
+        return match.group(1).decode('utf-8'), _DONE_RE.search(line) is not None
+    
+    chunk_data = json_loads(line)
+    return chunk_data.get('response'), chunk_data.get('done', False)
+
+def iter_stream_frames(response: requests.Response, chunk_size: int = 8192) -> Iterator[bytes]:
+    """
+    Yield newline-delimited frames from a streaming response as raw bytes.
+    
+    Transport errors are raised as requests exceptions, as iter_content would.
+    """
+    raw = response.raw
+    raw.decode_content = True
+    buf = bytearray()
+    
+    while True:
+        # read1 returns as soon as any data arrives, keeping the stream real-time
+        try:
+            chunk = raw.read1(chunk_size)
+        except ReadTimeoutError as e:
+            raise requests.exceptions.ConnectionError(e)
+        except ProtocolError as e:
+            raise requests.exceptions.ChunkedEncodingError(e)
+        if not chunk:
+            break
+        buf += chunk
+        
+        while (nl := buf.find(b'\n')) != -1:
+            line = bytes(buf[:nl])
+            del buf[:nl + 1]
+            if line.strip():
+                yield line
+    
+    if buf.strip():
+        yield bytes(buf)
+
+# Most Ollama requests in flight at once; concurrent callers are capped at this
+# so every connection fits in the pool and is kept alive for reuse
+OLLAMA_POOL_SIZE = 8
+
+# One pooled session per process, so analyzers created per request in the app
+# still reuse warm connections to Ollama
+_OLLAMA_SESSION = create_session(pool_size=OLLAMA_POOL_SIZE)
+atexit.register(_OLLAMA_SESSION.close)
+
+# Prompt sent to Ollama for each game; filled in by format_game_for_analysis
+_PROMPT_TEMPLATE = """
+Game Analysis Request:
+
+Player: {username} (Rating: {user_rating})
+Opponent: {opponent} (Rating: {opponent_rating})
+Color: {user_color}
+Result: {result}
+Opening: {opening_name} ({opening_eco})
+Game Status: {game_status}
+Time Control: {time_control}
+Total Moves: {total_moves}
+
+Moves: {formatted_moves}
+
+Please analyze this chess game and provide feedback on:
+1. Key strategic decisions and turning points
+2. Tactical mistakes or missed opportunities
+3. Opening play evaluation
+4. Endgame technique (if applicable)
+5. Specific suggestions for improvement
+6. Overall assessment of the player's performance
+
+Focus on constructive feedback that will help the player improve their chess skills.
+"""
 
 class OllamaAnalyzer:
     """Integration with local Ollama instance for chess game analysis."""
     
+    # Seconds a successful connection check is trusted before probing again
+    CONNECTION_CHECK_TTL = 300.0
+    
+    # Shared across instances (keyed by URL) so per-request analyzers in the app benefit too
+    _connection_ok_until: Dict[str, float] = {}
+    
     def __init__(self, ollama_url: str = "http://127.0.0.1:11434", cache_dir: str = "analysis_cache"):
         self.ollama_url = ollama_url
         self.api_url = f"{ollama_url}/api/generate"
         self.cache_dir = cache_dir
-        
-        # Create cache directory if it doesn't exist
-        if not os.path.exists(self.cache_dir):
-            os.makedirs(self.cache_dir)
+        self.cache_store = get_cache_store(cache_dir)
+        self.session = _OLLAMA_SESSION
     
     def test_connection(self) -> bool:
-        """Test connection to Ollama instance."""
+        """Test connection to Ollama instance, reusing a successful result for a few minutes."""
+        now = time.monotonic()
+        if now < self._connection_ok_until.get(self.ollama_url, 0.0):
+            return True
+        
         try:
-            response = requests.get(f"{self.ollama_url}/api/tags", timeout=5)
+            response = self.session.get(f"{self.ollama_url}/api/tags", timeout=5)
             response.raise_for_status()
-            return True
         except requests.exceptions.RequestException as e:
             print(f"✗ Failed to connect to Ollama: {e}")
             return False
+        
+        self._connection_ok_until[self.ollama_url] = now + self.CONNECTION_CHECK_TTL
+        return True
     
     def format_game_for_analysis(self, game: GameInfo, username: str) -> str:
         """Format game data for LLM analysis."""
-        user_color = "White" if game.white_player.lower() == username.lower() else "Black"
+        user_color = "White" if game.white_player_lc == username.lower() else "Black"
         opponent = game.black_player if user_color == "White" else game.white_player
         user_rating = game.white_rating if user_color == "White" else game.black_rating
         opponent_rating = game.black_rating if user_color == "White" else game.white_rating
@@ -187,43 +574,27 @@ class OllamaAnalyzer:
         else:
             result = "Loss"
         
-        # Format moves in pairs for readability
-        move_pairs = []
-        for i in range(0, len(game.moves), 2):
-            white_move = game.moves[i] if i < len(game.moves) else ""
-            black_move = game.moves[i + 1] if i + 1 < len(game.moves) else ""
-            move_num = (i // 2) + 1
-            if black_move:
-                move_pairs.append(f"{move_num}. {white_move} {black_move}")
-            else:
-                move_pairs.append(f"{move_num}. {white_move}")
-        
-        formatted_moves = " ".join(move_pairs)
+        # Format moves in pairs for readability; a trailing white move has no partner
+        moves = game.moves
+        formatted_moves = " ".join(
+            f"{move_num}. {white_move} {black_move}".rstrip()
+            for move_num, (white_move, black_move) in enumerate(zip_longest(moves[0::2], moves[1::2], fillvalue=""), 1)
+        )
         
-        return f"""
-Game Analysis Request:
-
-Player: {username} (Rating: {user_rating})
-Opponent: {opponent} (Rating: {opponent_rating})
-Color: {user_color}
-Result: {result}
-Opening: {game.opening_name} ({game.opening_eco})
-Game Status: {game.game_status}
-Time Control: {game.time_control}
-Total Moves: {game.total_moves}
-
-Moves: {formatted_moves}
-
-Please analyze this chess game and provide feedback on:
-1. Key strategic decisions and turning points
-2. Tactical mistakes or missed opportunities
-3. Opening play evaluation
-4. Endgame technique (if applicable)
-5. Specific suggestions for improvement
-6. Overall assessment of the player's performance
-
-Focus on constructive feedback that will help the player improve their chess skills.
-"""
+        return _PROMPT_TEMPLATE.format_map({
+            'username': username,
+            'user_rating': user_rating,
+            'opponent': opponent,
+            'opponent_rating': opponent_rating,
+            'user_color': user_color,
+            'result': result,
+            'opening_name': game.opening_name,
+            'opening_eco': game.opening_eco,
+            'game_status': game.game_status,
+            'time_control': game.time_control,
+            'total_moves': game.total_moves,
+            'formatted_moves': formatted_moves,
+        })
     
     def analyze_game(self, game: GameInfo, username: str, model: str = "llama3.2") -> Optional[str]:
         """
@@ -237,28 +608,35 @@ Focus on constructive feedback that will help the player improve their chess ski
         Returns:
             Analysis text from the LLM or None if failed
         """
-        if not self.test_connection():
-            return None
-        
         prompt = self.format_game_for_analysis(game, username)
         
+        # Streamed so the timeout bounds each gap between tokens rather than the
+        # whole generation, and the response is never buffered as one document
         payload = {
             "model": model,
             "prompt": prompt,
-            "stream": False
+            "stream": True
         }
         
         try:
             print(f"Analyzing game {game.game_id} with {model}...")
-            response = requests.post(
+            with self.session.post(
                 self.api_url,
                 json=payload,
-                timeout=60
-            )
-            response.raise_for_status()
+                timeout=60,
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                
+                # Read to the end of the body rather than stopping at the done
+                # frame, so the connection goes back to the pool for reuse
+                parts: List[str] = []
+                for line in iter_stream_frames(response):
+                    chunk_text, _ = parse_stream_frame(line)
+                    if chunk_text is not None:
+                        parts.append(chunk_text)
             
-            result = response.json()
-            return result.get('response', 'No analysis returned')
+            return ''.join(parts) if parts else 'No analysis returned'
             
         except requests.exceptions.RequestException as e:
             print(f"✗ Failed to analyze game: {e}")
@@ -267,13 +645,8 @@ Focus on constructive feedback that will help the player improve their chess ski
             print("✗ Invalid response from Ollama")
             return None
     
-    def get_cache_filename(self, game_id: str, model: str, username: str) -> str:
-        """Generate cache filename for a game analysis."""
-        safe_model = model.replace(":", "_").replace("/", "_")
-        return os.path.join(self.cache_dir, f"{game_id}_{username}_{safe_model}.json")
-    
     def save_analysis_to_cache(self, game_id: str, model: str, username: str, analysis: str, game_info: GameInfo) -> None:
-        """Save analysis result to cache file."""
+        """Save analysis result to the cache store."""
         cache_data = {
             "game_id": game_id,
             "model": model,
@@ -291,25 +664,18 @@ Focus on constructive feedback that will help the player improve their chess ski
             }
         }
         
-        cache_file = self.get_cache_filename(game_id, model, username)
         try:
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, indent=2, ensure_ascii=False)
-            print(f"✓ Analysis cached to {cache_file}")
+            self.cache_store.save(cache_data)
+            print(f"✓ Analysis for {game_id} cached to {self.cache_store.path}")
         except Exception as e:
             print(f"✗ Failed to cache analysis: {e}")
     
     def load_analysis_from_cache(self, game_id: str, model: str, username: str) -> Optional[Dict]:
         """Load analysis from cache if it exists."""
-        cache_file = self.get_cache_filename(game_id, model, username)
-        
-        if not os.path.exists(cache_file):
-            return None
-        
         try:
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-            print(f"✓ Loaded cached analysis from {cache_file}")
+            cache_data = self.cache_store.load(game_id, model, username)
+            if cache_data is not None:
+                print(f"✓ Loaded cached analysis for {game_id} from {self.cache_store.path}")
             return cache_data
         except Exception as e:
             print(f"✗ Failed to load cached analysis: {e}")
@@ -343,78 +709,98 @@ Focus on constructive feedback that will help the player improve their chess ski
         
         return analysis
 
-def analyze_game_with_llm(game_id: str, username: str = "lza808", model: str = "llama3.2:1b", force_refresh: bool = False) -> None:
+    def analyze_games_batch(self, games: List[GameInfo], username: str, model: str = "llama3.2:1b", concurrency: int = 4, force_refresh: bool = False) -> List[Optional[str]]:
+        """
+        Analyze several games concurrently, with caching.
+        
+        Ollama queues and batches concurrent requests server-side, so keeping a
+        few in flight cuts total time well below the sum of per-game latencies.
+        
+        Args:
+            games: GameInfo objects to analyze
+            username: Username of the player to analyze
+            model: Ollama model to use for analysis
+            concurrency: Maximum number of requests in flight at once (capped at OLLAMA_POOL_SIZE)
+            force_refresh: If True, bypass cache and generate new analyses
+        
+        Returns:
+            Analysis text for each game, in the same order (None where analysis failed)
+        """
+        with ThreadPoolExecutor(max_workers=min(concurrency, OLLAMA_POOL_SIZE)) as executor:
+            return list(executor.map(
+                lambda game: self.analyze_game_with_cache(game, username, model, force_refresh),
+                games
+            ))
+
+def analyze_game_with_llm(game_id: Union[str, List[str]], username: str = "lza808", model: str = "llama3.2:1b", force_refresh: bool = False) -> None:
     """
-    Analyze a specific game using Ollama LLM with caching support.
+    Analyze one or more games using Ollama LLM with caching support.
+    
+    Several game IDs are analyzed concurrently, with each analysis printed
+    once all of them have finished.
     
     Args:
-        game_id: ID of the game to analyze
+        game_id: ID of the game to analyze, or a list of IDs
         username: Username of the player
         model: Ollama model to use
         force_refresh: If True, bypass cache and generate new analysis
     """
+    # Each ID is analyzed once, even if it is listed twice
+    game_ids = [game_id] if isinstance(game_id, str) else list(dict.fromkeys(game_id))
+    
     # Load games
     games = analyze_games_from_file()
     if not games:
         print("No games found")
         return
     
-    # Find specific game
-    game = next((g for g in games if g.game_id == game_id), None)
-    if not game:
-        print(f"Game {game_id} not found")
+    # Find the requested games, keeping the first occurrence of a duplicated ID
+    by_id = {g.game_id: g for g in reversed(games)}
+    found = []
+    for gid in game_ids:
+        game = by_id.get(gid)
+        if game:
+            found.append(game)
+        else:
+            print(f"Game {gid} not found")
+    if not found:
         return
     
     # Analyze with Ollama (with caching)
     analyzer = OllamaAnalyzer()
-    analysis = analyzer.analyze_game_with_cache(game, username, model, force_refresh)
+    analyses = analyzer.analyze_games_batch(found, username, model, force_refresh=force_refresh)
     
-    if analysis:
-        print(f"\n{'='*60}")
-        print(f"GAME ANALYSIS - {game_id}")
-        print(f"{'='*60}")
-        print_game_summary(game)
-        print(f"\n{'='*60}")
-        print("LLM ANALYSIS:")
-        print(f"{'='*60}")
-        print(analysis)
-    else:
-        print("Failed to get analysis")
+    for game, analysis in zip(found, analyses):
+        if analysis:
+            print(f"\n{'='*60}")
+            print(f"GAME ANALYSIS - {game.game_id}")
+            print(f"{'='*60}")
+            print_game_summary(game)
+            print(f"\n{'='*60}")
+            print("LLM ANALYSIS:")
+            print(f"{'='*60}")
+            print(analysis)
+        else:
+            print(f"Failed to get analysis for game {game.game_id}")
 
 def list_cached_analyses(cache_dir: str = "analysis_cache") -> List[Dict]:
     """
-    List all cached analysis files.
+    List all cached analyses.
     
     Args:
         cache_dir: Directory containing cached analyses
     
     Returns:
-        List of cached analysis metadata
+        List of cached analysis metadata, newest first
     """
     if not os.path.exists(cache_dir):
         return []
     
-    cached_analyses = []
-    for filename in os.listdir(cache_dir):
-        if filename.endswith('.json'):
-            filepath = os.path.join(cache_dir, filename)
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    cache_data = json.load(f)
-                
-                cached_analyses.append({
-                    'filename': filename,
-                    'game_id': cache_data.get('game_id'),
-                    'model': cache_data.get('model'),
-                    'username': cache_data.get('username'),
-                    'timestamp': cache_data.get('timestamp'),
-                    'opening': cache_data.get('game_info', {}).get('opening_name', 'Unknown')
-                })
-            except Exception as e:
-                print(f"Warning: Could not read {filename}: {e}")
-                continue
-    
-    return sorted(cached_analyses, key=lambda x: x['timestamp'] or '', reverse=True)
+    try:
+        return get_cache_store(cache_dir).list_metadata()
+    except Exception as e:
+        print(f"Warning: Could not read analysis cache: {e}")
+        return []
 
 def show_cached_analyses() -> None:
     """Display all cached analyses in a readable format."""
@@ -428,7 +814,7 @@ def show_cached_analyses() -> None:
     print("=" * 60)
     
     for analysis in cached:
-        timestamp = datetime.fromisoformat(analysis['timestamp']).strftime('%Y-%m-%d %H:%M:%S') if analysis['timestamp'] else 'Unknown'
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(analysis['mtime'])) if analysis['mtime'] else 'Unknown'
         print(f"Game: {analysis['game_id']} | Model: {analysis['model']} | Player: {analysis['username']}")
         print(f"Opening: {analysis['opening']} | Analyzed: {timestamp}")
         print("-" * 40)
@@ -438,35 +824,31 @@ def main():
     print("Chess Game Analyzer")
     print("=" * 30)
     
-    # Analyze games
-    games = analyze_games_from_file()
+    # Tally results and openings in a single pass over the games file
+    summary = summarize_games_from_file("lza808")
     
-    if not games:
+    if not summary or not summary['total_games']:
         print("No games found or error loading games")
         return
     
-    print(f"Loaded {len(games)} games")
+    print(f"Loaded {summary['total_games']} games")
     
     # Show first few games
-    for i, game in enumerate(games[:3]):
+    games = list(islice(iter_games_from_file(), 3))
+    for i, game in enumerate(games):
         print_game_summary(game)
         if i < 2:
             print("-" * 50)
     
     # Show stats for lza808
-    stats = get_win_loss_stats(games, "lza808")
     print(f"\nStats for lza808:")
-    print(f"Wins: {stats['wins']}")
-    print(f"Losses: {stats['losses']}")
-    print(f"Draws: {stats['draws']}")
+    print(f"Wins: {summary['wins']}")
+    print(f"Losses: {summary['losses']}")
+    print(f"Draws: {summary['draws']}")
     
     # Show most common openings
-    opening_counts = {}
-    for game in games:
-        opening_counts[game.opening_name] = opening_counts.get(game.opening_name, 0) + 1
-    
     print(f"\nMost Common Openings:")
-    for opening, count in sorted(opening_counts.items(), key=lambda x: x[1], reverse=True)[:5]:
+    for opening, count in summary['top_openings']:
         print(f"{opening}: {count} games")
     
     # Test Ollama connection
@@ -478,6 +860,8 @@ def main():
         print(f"analyze_game_with_llm('{games[0].game_id}')")
         print(f"\nTo force refresh analysis:")
         print(f"analyze_game_with_llm('{games[0].game_id}', force_refresh=True)")
+        print(f"\nTo analyze several games concurrently:")
+        print(f"analyze_game_with_llm({[g.game_id for g in games[:2]]})")
     else:
         print("✗ Ollama connection failed")
     
@@ -9,10 +9,12 @@ Usage: uv run python lichess_games.py
 import os
 import sys
 import requests
-from typing import Optional
+from typing import BinaryIO, Iterator, Optional
 import json
 import time
 from datetime import datetime
+from urllib3.util.retry import Retry
+from game_analyzer import create_session, json_dumps, json_loads
 
 class LichessGamesFetcher:
     def __init__(self, api_token: Optional[str] = None):
@@ -21,6 +23,15 @@ class LichessGamesFetcher:
         self.base_url = "https://lichess.org/api"
         self.username = "lza808"
 
+        # Reuse one TLS connection to lichess.org across batches, retrying
+        # transient failures and honouring Retry-After on rate limits
+        self.session = create_session(retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504)
+        ))
+        self.session.headers.update(self.get_headers())
+
         # if not self.api_token:
         #     raise ValueError("API token is required. Set LICHESS_API_TOKEN environment variable or pass it directly.")
 
@@ -46,9 +57,9 @@ class LichessGamesFetcher:
     #         print(f"✗ Authentication failed: {e}")
     #         return False
 
-    def fetch_games(self, max_games: Optional[int] = 30, since: Optional[int] = None, until: Optional[int] = None) -> list:
+    def iter_game_lines(self, max_games: Optional[int] = 30, since: Optional[int] = None, until: Optional[int] = None) -> Iterator[bytes]:
         """
-        Fetch games for the user.
+        Stream games for the user as raw NDJSON lines (bytes), one game per line, without parsing them.
 
         Args:
             max_games: Maximum number of games to fetch
@@ -72,45 +83,68 @@ class LichessGamesFetcher:
             print(f"Parameters: {params}")
 
         try:
-            response = requests.get(
+            response = self.session.get(
                 url,
-                headers=self.get_headers(),
                 params=params,
                 timeout=30,
                 stream=True
             )
             response.raise_for_status()
 
-            games = []
-            for line in response.iter_lines(decode_unicode=True):
+            for line in response.iter_lines():
                 if line.strip():
-                    try:
-                        game = json.loads(line)
-                        games.append(game)
-                    except json.JSONDecodeError:
-                        print(f"Warning: Could not parse line: {line[:100]}...")
-                        continue
-
-            print(f"✓ Successfully fetched {len(games)} games")
-            return games
+                    yield line
 
         except requests.exceptions.RequestException as e:
+            # Re-raise so a dropped connection isn't mistaken for the end of the archive
             print(f"✗ Failed to fetch games: {e}")
-            return []
+            raise
 
-    def fetch_all_games(self, batch_size: int = 30, delay_between_batches: float = 1.0) -> list:
+    def fetch_games(self, max_games: Optional[int] = 30, since: Optional[int] = None, until: Optional[int] = None) -> list:
         """
-        Fetch all games for the user in batches with rate limiting.
+        Fetch games for the user.
+
+        Args:
+            max_games: Maximum number of games to fetch
+            since: Timestamp in milliseconds to fetch games since
+            until: Timestamp in milliseconds to fetch games until
+        """
+        games = []
+        for line in self.iter_game_lines(max_games, since, until):
+            try:
+                games.append(json_loads(line))
+            except json.JSONDecodeError:
+                print(f"Warning: Could not parse line: {line[:100].decode(errors='replace')}...")
+                continue
+
+        print(f"✓ Successfully fetched {len(games)} games")
+        return games
+
+    def fetch_all_games(self, sink: BinaryIO, batch_size: Optional[int] = None, delay_between_batches: float = 1.0) -> int:
+        """
+        Fetch all games for the user, streaming them to a file.
+
+        Each game is written to the sink as one NDJSON line as soon as it arrives.
+        By default the whole archive is streamed in a single request; with a
+        batch_size, games are paged with the until= cursor and rate limited,
+        parsing only the last line of each batch to find the next cursor.
         
         Args:
-            batch_size: Number of games to fetch per batch (max 30)
+            sink: Binary file to write NDJSON lines to
+            batch_size: Number of games to fetch per batch (max 30), or None for one request
             delay_between_batches: Delay in seconds between batch requests
+
+        Returns:
+            Total number of games written
         """
+        if batch_size is None:
+            return self._stream_all_games(sink)
+        
         if batch_size > 30:
             batch_size = 30
             print("Warning: batch_size reduced to 30 (API limit)")
         
-        all_games = []
+        total_games = 0
         batch_num = 1
         last_timestamp = None
         
@@ -121,30 +155,39 @@ class LichessGamesFetcher:
             print(f"\n--- Batch {batch_num} ---")
             
             # Fetch batch with timestamp filter to avoid duplicates
-            batch_games = self.fetch_games(
+            batch_count = 0
+            last_line = None
+            for line in self.iter_game_lines(
                 max_games=batch_size,
                 until=last_timestamp  # Fetch games older than the last game from previous batch
-            )
+            ):
+                sink.write(line)
+                sink.write(b'\n')
+                batch_count += 1
+                last_line = line
             
-            if not batch_games:
+            if not batch_count:
                 print("No more games found. Finished fetching all games.")
                 break
             
-            # Add games to our collection
-            all_games.extend(batch_games)
+            total_games += batch_count
             
             # Update timestamp for next batch (use oldest game's timestamp)
-            last_timestamp = batch_games[-1].get('createdAt')
+            try:
+                last_timestamp = json_loads(last_line).get('createdAt')
+            except json.JSONDecodeError:
+                print(f"Warning: Could not parse line: {last_line[:100].decode(errors='replace')}...")
+                break
             
-            print(f"Fetched {len(batch_games)} games in batch {batch_num}")
-            print(f"Total games collected so far: {len(all_games)}")
+            print(f"Fetched {batch_count} games in batch {batch_num}")
+            print(f"Total games collected so far: {total_games}")
             
             if last_timestamp:
                 readable_date = datetime.fromtimestamp(last_timestamp / 1000).strftime('%Y-%m-%d %H:%M:%S')
                 print(f"Oldest game in this batch: {readable_date}")
             
             # If we got fewer games than requested, we've reached the end
-            if len(batch_games) < batch_size:
+            if batch_count < batch_size:
                 print("Received fewer games than requested. Reached end of games list.")
                 break
             
@@ -155,14 +198,31 @@ class LichessGamesFetcher:
             
             batch_num += 1
         
-        print(f"\n✓ Finished fetching all games. Total: {len(all_games)} games")
-        return all_games
+        print(f"\n✓ Finished fetching all games. Total: {total_games} games")
+        return total_games
+
+    def _stream_all_games(self, sink: BinaryIO) -> int:
+        """Stream the user's entire archive in one request, writing each game as it arrives."""
+        print("Streaming all games in a single request...")
+        
+        total_games = 0
+        for line in self.iter_game_lines(max_games=None):
+            sink.write(line)
+            sink.write(b'\n')
+            total_games += 1
+            if total_games % 100 == 0:
+                print(f"Total games collected so far: {total_games}")
+        
+        print(f"\n✓ Finished fetching all games. Total: {total_games} games")
+        return total_games
 
-    def save_games_to_file(self, games: list, filename: str = "lichess_games.json"):
-        """Save games to a JSON file."""
+    def save_games_to_file(self, games: list, filename: str = "lichess_games.ndjson"):
+        """Save games to an NDJSON file, one game per line."""
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(games, f, indent=2, ensure_ascii=False)
+            with open(filename, 'wb') as f:
+                for game in games:
+                    f.write(json_dumps(game))
+                    f.write(b'\n')
             print(f"✓ Games saved to {filename}")
         except Exception as e:
             print(f"✗ Failed to save games: {e}")
@@ -188,20 +248,28 @@ def main():
         # if not fetcher.test_auth():
         #     return 1
 
-        # Fetch all games with batching and rate limiting
+        # Stream all games to a temporary file so a failed fetch doesn't
+        # clobber the existing games
         print("\nFetching all games...")
-        games = fetcher.fetch_all_games(batch_size=30, delay_between_batches=1.0)
+        filename = "lichess_games.ndjson"
+        temp_filename = f"{filename}.tmp"
+        try:
+            with open(temp_filename, 'wb') as f:
+                total_games = fetcher.fetch_all_games(f)
+        except Exception:
+            # A partial download must never replace the existing games
+            os.remove(temp_filename)
+            raise
 
-        if games:
-            # Save to file
-            fetcher.save_games_to_file(games)
+        if total_games:
+            os.replace(temp_filename, filename)
+            print(f"✓ Games saved to {filename}")
 
             # Print some basic stats
             print(f"\nGame Statistics:")
-            print(f"Total games: {len(games)}")
-            if games:
-                print(f"Latest game: {games[0].get('createdAt', 'Unknown')}")
-                print(f"Oldest game: {games[-1].get('createdAt', 'Unknown')}")
+            print(f"Total games: {total_games}")
+        else:
+            os.remove(temp_filename)
 
         return 0
 
@@ -2,20 +2,171 @@ import chess
 import chess.pgn
 import chess.svg
 import io
+from functools import lru_cache
 from PIL import Image
+import cairosvg
 import imageio
+import numpy as np
 import os
 
-def pgn_to_gif_or_video(pgn_file, output_file, output_format="gif", fps=1):
+# Board squares and pieces need only a handful of colors; the rest of the
+# palette goes to antialiased piece edges
+GIF_COLORS = 64
+
+def _rasterize(svg_data, size):
+    """Rasterize an SVG board to a size x size RGB array."""
+    png_data = cairosvg.svg2png(bytestring=svg_data.encode('utf-8'), output_width=size, output_height=size)
+    return np.asarray(Image.open(io.BytesIO(png_data)).convert('RGB'))
+
+def _is_light_square(square):
+    return bool(chess.BB_SQUARES[square] & chess.BB_LIGHT_SQUARES)
+
+def _square_slice(square, square_size):
+    """Pixel region of a square on a board drawn from White's side."""
+    x = chess.square_file(square) * square_size
+    y = (7 - chess.square_rank(square)) * square_size
+    return slice(y, y + square_size), slice(x, x + square_size)
+
+@lru_cache(maxsize=None)
+def _board_sprites(square_size):
+    """
+    Rasterize the empty board and every piece on a light and a dark square, once per size.
+
+    Boards are drawn without coordinates or borders, directly at the output
+    size, so each square is exactly square_size pixels and sprites can be
+    copied straight into a frame.
+
+    Args:
+        square_size (int): Width of one square in pixels.
+
+    Returns:
+        Tuple of (empty board array, dict mapping (piece symbol, is light square) to a square array)
+    """
+    size = square_size * 8
+    background = _rasterize(chess.svg.board(chess.Board.empty(), size=size, coordinates=False), size)
+
+    # Lay out all 12 pieces on both square colors on a single board so every
+    # sprite comes from one render
+    pieces = [chess.Piece(piece_type, color) for color in chess.COLORS for piece_type in chess.PIECE_TYPES]
+    light_squares = [square for square in chess.SQUARES if _is_light_square(square)]
+    dark_squares = [square for square in chess.SQUARES if not _is_light_square(square)]
+    layout = {}
+    for piece, light_square, dark_square in zip(pieces, light_squares, dark_squares):
+        layout[light_square] = piece
+        layout[dark_square] = piece
+
+    board = chess.Board.empty()
+    board.set_piece_map(layout)
+    image = _rasterize(chess.svg.board(board, size=size, coordinates=False), size)
+
+    sprites = {}
+    for square, piece in layout.items():
+        sprites[piece.symbol(), _is_light_square(square)] = image[_square_slice(square, square_size)].copy()
+
+    return background, sprites
+
+@lru_cache(maxsize=None)
+def _palette_sprites(square_size):
     """
-    Convert a PGN file to a GIF or MP4 video of the chess game.
+    Quantize the board and sprites to one shared GIF palette, once per size.
+
+    Every frame is assembled from these tiles, so frames built from the
+    palette-index versions need no per-frame quantization.
+
+    Args:
+        square_size (int): Width of one square in pixels.
+
+    Returns:
+        Tuple of (empty board indices, dict of sprite indices keyed like _board_sprites, flat RGB palette)
+    """
+    background, sprites = _board_sprites(square_size)
+    keys = list(sprites)
+
+    # Quantize all tiles together as one column of pixels (no dithering, so
+    # each pixel maps to the same index wherever its tile is drawn)
+    pixels = np.concatenate([background.reshape(-1, 3)] + [sprites[key].reshape(-1, 3) for key in keys])
+    quantized = Image.fromarray(pixels.reshape(-1, 1, 3)).quantize(colors=GIF_COLORS, dither=Image.Dither.NONE)
+    indices = np.asarray(quantized).reshape(-1)
+
+    background_size = background.shape[0] * background.shape[1]
+    sprite_size = square_size * square_size
+    palette_background = indices[:background_size].reshape(background.shape[:2])
+    palette_sprites = {}
+    for i, key in enumerate(keys):
+        start = background_size + i * sprite_size
+        palette_sprites[key] = indices[start:start + sprite_size].reshape(square_size, square_size)
+
+    return palette_background, palette_sprites, quantized.getpalette()
+
+def _draw_square(frame, square, piece, background, sprites):
+    """Redraw one square of a frame with its piece (or as empty)."""
+    region = _square_slice(square, background.shape[0] // 8)
+    if piece is None:
+        frame[region] = background[region]
+    else:
+        frame[region] = sprites[piece.symbol(), _is_light_square(square)]
+
+def _piece_masks(board):
+    """Bitboards that together pin down every square's contents."""
+    return (board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings,
+            board.occupied_co[chess.WHITE])
+
+def _iter_frames(board, moves, background, sprites):
+    """
+    Yield the board image after each move.
+
+    The same array is updated in place and yielded every time, so callers
+    that keep frames must copy them.
+
+    Args:
+        board (chess.Board): Position before the first move (pushed to as moves are played).
+        moves (iterable): Moves to play.
+        background (np.ndarray): Empty board, RGB or palette indices.
+        sprites (dict): Piece tiles matching the background's format.
+    """
+    # Draw the starting position
+    frame = background.copy()
+    for square, piece in board.piece_map().items():
+        _draw_square(frame, square, piece, background, sprites)
+    masks = _piece_masks(board)
+
+    for move in moves:
+        # Make the move on the board
+        board.push(move)
+
+        # Redraw only the squares whose contents changed, which also covers
+        # castling rooks, en passant captures and promotions
+        new_masks = _piece_masks(board)
+        changed = 0
+        for mask, new_mask in zip(masks, new_masks):
+            changed |= mask ^ new_mask
+        for square in chess.scan_forward(changed):
+            _draw_square(frame, square, board.piece_at(square), background, sprites)
+        masks = new_masks
+
+        yield frame
+
+def pgn_to_gif_or_video(pgn_file, output_file, output_format="gif", fps=1, size=400):
+    """
+    Convert a PGN file to a GIF, animated WebP or MP4 video of the chess game.
+
+    The board is rasterized once up front; each frame is then built by
+    copying piece sprites onto only the squares the move changed. GIF
+    frames are drawn in a shared palette. MP4 frames are handed to the
+    encoder one at a time as they are drawn; Pillow's GIF writer keeps a
+    copy of every frame until it finishes, so GIF output does not stream.
 
     Args:
         pgn_file (str): Path to the input PGN file.
-        output_file (str): Path to save the output GIF or MP4.
-        output_format (str): 'gif' or 'mp4' to specify output type.
+        output_file (str): Path to save the output GIF, WebP or MP4.
+        output_format (str): 'gif', 'webp' or 'mp4' to specify output type.
         fps (int): Frames per second for the animation (controls speed).
+        size (int): Board width and height in pixels (rounded down to a multiple of 8).
     """
+    # Ensure output format is valid
+    if output_format not in ["gif", "webp", "mp4"]:
+        raise ValueError("Output format must be 'gif', 'webp' or 'mp4'.")
+
     # Read the PGN file
     with open(pgn_file, 'r') as pgn:
         game = chess.pgn.read_game(pgn)
@@ -23,51 +174,79 @@ def pgn_to_gif_or_video(pgn_file, output_file, output_format="gif", fps=1):
     if game is None:
         raise ValueError("No valid game found in the PGN file.")
 
-    # Initialize the board
+    if game.next() is None:
+        raise ValueError("The game in the PGN file has no moves.")
+
     board = game.board()
-    images = []
+    moves = game.mainline_moves()
 
-    # Iterate through all moves in the game
-    for move in game.mainline_moves():
-        # Make the move on the board
-        board.push(move)
+    # Squares must be whole pixels for sprites to line up with the board
+    square_size = size // 8
+    if square_size < 1:
+        raise ValueError("Size must be at least 8 pixels.")
 
-        # Generate SVG for the current board position
-        svg_data = chess.svg.board(board=board, size=400)
+    # Save the frames as GIF, WebP or MP4
+    if output_format == "gif":
+        # Frames are drawn directly as indices into one shared palette
+        background, sprites, palette = _palette_sprites(square_size)
 
-        # Convert SVG to PNG using Pillow
-        svg_bytes = io.BytesIO(svg_data.encode('utf-8'))
-        img = Image.open(svg_bytes)
+        def gif_frames():
+            for frame in _iter_frames(board, moves, background, sprites):
+                # fromarray shares the array's memory, and the frame is redrawn in place
+                image = Image.fromarray(frame.copy())
+                image.putpalette(palette)
+                yield image
 
-        # Convert to RGB (required for GIF/MP4)
-        img = img.convert('RGB')
-        images.append(img)
+        # Saves building a full-game RGB array up front, but Pillow's GIF writer
+        # still copies every frame into its own list before writing, so memory
+        # still grows with the number of moves
+        frames = gif_frames()
+        next(frames).save(
+            output_file,
+            save_all=True,
+            append_images=frames,
+            duration=1000//fps,  # Duration per frame in milliseconds
+            loop=0,  # Loop forever
+            # Keep each frame in place: Pillow writes later frames as just the
+            # region that changed, which is drawn over the previous frame
+            disposal=1,
+            # Frames already hold indices into the shared palette; write them as-is
+            optimize=False
+        )
+    elif output_format == "webp":
+        background, sprites = _board_sprites(square_size)
 
-    # Ensure output format is valid
-    if output_format not in ["gif", "mp4"]:
-        raise ValueError("Output format must be 'gif' or 'mp4'.")
+        def webp_frames():
+            for frame in _iter_frames(board, moves, background, sprites):
+                yield Image.fromarray(frame.copy())
 
-    # Save the images as GIF or MP4
-    if output_format == "gif":
-        images[0].save(
+        # Lossless WebP keeps the flat board colors exact and encodes RGB
+        # frames directly, with no palette step
+        frames = webp_frames()
+        next(frames).save(
             output_file,
             save_all=True,
-            append_images=images[1:],
+            append_images=frames,
             duration=1000//fps,  # Duration per frame in milliseconds
-            loop=0  # Loop forever
+            loop=0,  # Loop forever
+            lossless=True
         )
     elif output_format == "mp4":
-        # Convert PIL images to numpy arrays for imageio
-        images_np = [np.array(img) for img in images]
-        imageio.mimwrite(output_file, images_np, fps=fps, macro_block_size=1)
+        background, sprites = _board_sprites(square_size)
+        writer = imageio.get_writer(output_file, fps=fps, macro_block_size=1)
+        try:
+            for frame in _iter_frames(board, moves, background, sprites):
+                writer.append_data(frame)
+        finally:
+            writer.close()
 
     print(f"Successfully created {output_file}")
 
 def main():
     # Example usage
     pgn_file = "game.pgn"  # Replace with your PGN file path
-    output_file = "chess_game.gif"  # Output file (change to .mp4 for video)
-    output_format = "gif"  # Change to "mp4" for video output
+    output_file = "chess_game.gif"  # Output file (change to .webp or .mp4 to match the format)
+    output_format = "gif"  # Change to "webp" for animated WebP or "mp4" for video output
     fps = 1  # Adjust speed of animation (frames per second)
 
     try: